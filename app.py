@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session
+from flask import Flask, Response, g, render_template, jsonify, request, redirect, url_for, flash, session
 import pandas as pd
 from data_manager import DataManager
 import utils
@@ -8,12 +8,14 @@ from authlib.integrations.flask_client import OAuth
 from urllib.parse import urlencode
 import os
 import json
+from datetime import datetime
 from dotenv import load_dotenv
 
 # Cargar variables de entorno locales (.env)
 load_dotenv()
 
 from market_data import MarketData
+from live_updates import LiveFeed
 
 app = Flask(__name__)
 # Necesario para sesiones Flask
@@ -54,16 +56,38 @@ def load_user(user_id):
     return User(user_id)
 
 dm = DataManager()
+live_feed = LiveFeed()
+# El dashboard solo abre el stream SSE si el servidor lo soporta (asgi.py lo activa)
+app.config['LIVE_UPDATES'] = False
 
 # Context Processor para datos globales (Sidebar)
 @app.context_processor
 def inject_market_data():
+    # El modo async (asgi.py) ya los trajo sin bloquear el event loop
+    if 'indicators' in g:
+        return dict(indicators=g.indicators)
     try:
         indicators = MarketData.get_economic_indicators()
     except:
         indicators = {}
     return dict(indicators=indicators)
 
+def with_current_balance(config):
+    try:
+        current_balance, now_ts = utils.calculate_current_balance(config)
+        config['current_balance'] = current_balance
+        config['server_now'] = now_ts.isoformat()
+    except Exception as e:
+        print(f"Error calculando catch-up balance: {e}")
+        config['current_balance'] = config.get('balance_historico', 0)
+    return config
+
+def publish_balance_checkpoint(user_id, config):
+    # Checkpoint autoritativo para las otras pestañas abiertas del usuario
+    # (`config` ya validado por utils.parse_financial_config)
+    checkpoint = with_current_balance(dict(config, timestamp=datetime.now().isoformat()))
+    live_feed.publish('balance', checkpoint, user_id=user_id)
+
 # API para Configuración Financiera (Ticker)
 @app.route('/api/financial-config', methods=['GET', 'POST'])
 @login_required
@@ -72,28 +96,7 @@ def financial_config():
         config = dm.get_user_config(current_user.id)
         
         # Lógica de "Catch-up" (Poner al día el contador)
-        try:
-            last_ts = datetime.fromisoformat(config.get('timestamp'))
-            now_ts = datetime.now()
-            diff_seconds = (now_ts - last_ts).total_seconds()
-            
-            capital = float(config.get('capital', 0))
-            rate = float(config.get('rate', 0))
-            balance_historico = float(config.get('balance_historico', 0))
-            
-            # Ganancia por segundo (Gs)
-            gs = (capital * (rate / 100)) / 31536000 # 365 * 24 * 3600
-            
-            # Nuevo saldo inicial = histórico + (tiempo * ganancia)
-            accrued_profit = max(0, diff_seconds * gs)
-            current_balance = balance_historico + accrued_profit
-            
-            config['current_balance'] = current_balance
-            config['server_now'] = now_ts.isoformat()
-        except Exception as e:
-            print(f"Error calculando catch-up balance: {e}")
-            config['current_balance'] = config.get('balance_historico', 0)
-            
+        with_current_balance(config)
         return jsonify(config)
     
     if request.method == 'POST':
@@ -101,15 +104,27 @@ def financial_config():
         print(f"📥 POST /api/financial-config received: {data}")
         
         # El servidor es el dueño del tiempo, pero DataManager ya pone el timestamp.
-        # Solo validamos que los datos sean numéricos básicos si fuera necesario, 
-        # pero delegamos a DataManager la persistencia del objeto.
+        # Validamos y convertimos una sola vez; lo guardado y el checkpoint usan lo mismo.
+        try:
+            config = utils.parse_financial_config(data)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         
-        success = dm.save_user_config(current_user.id, current_user.email, data)
+        success = dm.save_user_config(current_user.id, current_user.email, config)
         if success:
+            publish_balance_checkpoint(current_user.id, config)
             return jsonify({"status": "success", "server_time": datetime.now().isoformat()})
         else:
             return jsonify({"status": "error"}), 500
 
+# Stream SSE (cotizaciones, indicadores y checkpoints de balance)
+# Solo lo sirve el modo async (asgi.py): acá cada conexión ociosa ocuparía un hilo
+# (o bloquearía un worker sync entero). El 204 le indica a EventSource que no reconecte.
+@app.route('/api/stream')
+@login_required
+def stream():
+    return Response(status=204)
+
 @app.route('/debug-sheets')
 @login_required
 def debug_sheets():
@@ -182,6 +197,10 @@ def dashboard():
     # Cotizaciones Dólar
     dolar_rates = MarketData.get_dolar_rates()
 
+    return render_dashboard(finanzas_df, propiedades_df, inventario_df, vencimientos_df, dolar_rates)
+
+def render_dashboard(finanzas_df, propiedades_df, inventario_df, vencimientos_df, dolar_rates):
+    # Parte CPU (métricas, mapa, template); la comparte el modo async (asgi.py)
     # Métricas
     pesos_s, ganancia_diaria, capital = utils.calculate_financial_pulse(finanzas_df)
     
@@ -0,0 +1,237 @@
+"""
+Modo de servicio async (ASGI).
+
+Las rutas que pasan la mayor parte del tiempo esperando upstreams (dashboard,
+configuración financiera y el stream SSE) se atienden con corutinas: Sheets,
+DolarApi y ArgentinaDatos se consultan con pools httpx y ningún worker queda
+bloqueado mientras tanto. El resto (login/callback de Auth0, logout, static,
+debug) y cualquier request sin sesión caen en la app Flask de siempre vía
+a2wsgi. El modo sync (`gunicorn app:app`) sigue soportado, pero sin stream SSE:
+ahí el dashboard no abre /api/stream (ver LIVE_UPDATES).
+
+Los checkpoints de balance (POST /api/financial-config) solo llegan a las
+pestañas conectadas al mismo proceso que atendió el POST: con `--workers N`
+una pestaña servida por otro worker no lo ve en vivo y recién se pone al día
+al recargar. Las cotizaciones y los indicadores sí llegan a todas, porque cada
+proceso tiene su propio feed.
+
+Uso (es el proceso web del Procfile):
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+from flask import g
+from flask_login import current_user
+
+from app import app as flask_app, dm, live_feed, with_current_balance, publish_balance_checkpoint, render_dashboard
+from live_updates import format_sse
+from market_data import MarketData
+import utils
+
+# El stream SSE solo se sirve acá: una conexión ociosa es un Future, no un hilo
+flask_app.config['LIVE_UPDATES'] = True
+
+# El cliente reconecta solo; cortar cada tanto evita conexiones eternas tras proxies
+STREAM_MAX_SECONDS = 300
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_RETRY_MS = 5000
+
+
+def _request_context(scope):
+    # Contexto Flask armado desde el scope ASGI: sesión, current_user, url_for y templates
+    headers = [(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']]
+    return flask_app.test_request_context(scope['path'], method=scope['method'], headers=headers,
+                                          query_string=scope.get('query_string', b''))
+
+
+def _authenticated_user(scope):
+    with _request_context(scope):
+        if current_user.is_authenticated:
+            return current_user.id, current_user.email
+    return None
+
+
+async def _send_response(send, status, body, content_type):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, data, status=200):
+    # Mismo cuerpo que jsonify en el modo sync
+    body = flask_app.json.response(data).get_data()
+    await _send_response(send, status, body, 'application/json')
+
+
+def _is_json(scope):
+    content_type = dict(scope['headers']).get(b'content-type', b'').decode('latin-1')
+    mimetype = content_type.split(';')[0].strip().lower()
+    return mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+# --- RUTAS ASYNC ---
+def _render_dashboard_in_context(scope, indicators, *data):
+    with _request_context(scope):
+        g.indicators = indicators
+        return render_dashboard(*data)
+
+
+async def dashboard(scope, receive, send, user):
+    # Todas las lecturas en paralelo; cada una pasa por su cache single-flight
+    finanzas_df, propiedades_df, inventario_df, vencimientos_df, dolar_rates, indicators = await asyncio.gather(
+        dm.get_data_async("Finanzas"),
+        dm.get_data_async("Propiedades"),
+        dm.get_data_async("Inventario"),
+        dm.get_data_async("Vencimientos"),
+        MarketData.get_dolar_rates_async(),
+        MarketData.get_economic_indicators_async(),
+    )
+    # Mapa + template es trabajo de CPU: fuera del event loop
+    html = await asyncio.to_thread(_render_dashboard_in_context, scope, indicators,
+                                   finanzas_df, propiedades_df, inventario_df, vencimientos_df, dolar_rates)
+    await _send_response(send, 200, html.encode(), 'text/html; charset=utf-8')
+
+
+async def financial_config(scope, receive, send, user):
+    user_id, user_email = user
+    if scope['method'] == 'GET':
+        config = await dm.get_user_config_async(user_id)
+        # Lógica de "Catch-up" (Poner al día el contador)
+        await _send_json(send, with_current_balance(config))
+        return
+
+    # Igual que request.json en Flask: sin Content-Type JSON es 415. Además evita que
+    # un formulario/fetch "simple" de otro sitio (sin preflight CORS) pise la config
+    if not _is_json(scope):
+        await _send_json(send, {"status": "error"}, status=415)
+        return
+    try:
+        data = json.loads(await _read_body(receive))
+    except ValueError:
+        await _send_json(send, {"status": "error"}, status=400)
+        return
+    print(f"📥 POST /api/financial-config received: {data}")
+
+    try:
+        config = utils.parse_financial_config(data)
+    except ValueError as e:
+        await _send_json(send, {"status": "error", "message": str(e)}, status=400)
+        return
+
+    success = await dm.save_user_config_async(user_id, user_email, config)
+    if success:
+        publish_balance_checkpoint(user_id, config)
+        await _send_json(send, {"status": "success", "server_time": datetime.now().isoformat()})
+    else:
+        await _send_json(send, {"status": "error"}, status=500)
+
+
+async def _stream_events(send, user_id):
+    seq = live_feed.seq
+    deadline = time.time() + STREAM_MAX_SECONDS
+
+    async def emit(chunk):
+        await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+    await emit(f"retry: {STREAM_RETRY_MS}\n\n")
+    # Sin checkpoint inicial: la página ya sincroniza el balance con GET /api/financial-config,
+    # así no pagamos una lectura de Sheets por pestaña y por reconexión
+    await emit(format_sse('snapshot', live_feed.snapshot()))
+
+    while time.time() < deadline:
+        seq, events, missed = await live_feed.wait_async(seq, timeout=STREAM_KEEPALIVE_SECONDS)
+        if missed:
+            await emit(format_sse('snapshot', live_feed.snapshot()))
+        elif not events:
+            await emit(": keepalive\n\n")
+        for event_user, message in events:
+            if event_user is None or event_user == user_id:
+                await emit(message)
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream(scope, receive, send, user):
+    await live_feed.start()
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')],
+    })
+
+    # Una conexión ociosa es solo un Future esperando; si el cliente se va, se cancela
+    producer = asyncio.ensure_future(_stream_events(send, user[0]))
+    watcher = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await asyncio.wait({producer, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        producer.cancel()
+        watcher.cancel()
+    if producer.done() and not producer.cancelled():
+        producer.result()
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+ROUTES = {
+    ('/', 'GET'): dashboard,
+    ('/api/financial-config', 'GET'): financial_config,
+    ('/api/financial-config', 'POST'): financial_config,
+    ('/api/stream', 'GET'): stream,
+}
+
+
+class AsyncApp:
+    def __init__(self, wsgi_app):
+        # Todo lo que no es async corre en el threadpool de a2wsgi
+        self.wsgi = WSGIMiddleware(wsgi_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        if scope['type'] == 'http':
+            handler = ROUTES.get((scope['path'], scope['method']))
+            # Sin sesión válida delegamos en Flask, que aplica login_required (redirect)
+            user = handler and _authenticated_user(scope)
+            if user:
+                await handler(scope, receive, send, user)
+                return
+
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Frenar el feed y cerrar los pools HTTP
+                live_feed.stop()
+                await dm.aclose()
+                await MarketData.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = AsyncApp(flask_app)
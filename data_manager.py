@@ -2,9 +2,15 @@ import pandas as pd
 from datetime import datetime, timedelta
 import os
 import json
+import asyncio
+from urllib.parse import quote
 import gspread
+from gspread.utils import fill_gaps, numericise_all, to_records
+import httpx
 from oauth2client.service_account import ServiceAccountCredentials
-import cachetools.func
+from singleflight import ttl_single_flight, async_ttl_single_flight
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
 
 class DataManager:
     def __init__(self):
@@ -15,6 +21,9 @@ class DataManager:
         self.sheet = None
         self.use_mock = True
         self.last_error = None
+        # Modo async: pool HTTP hacia la API REST de Sheets (se crea al primer uso)
+        self._http = None
+        self._token_lock = asyncio.Lock()
         
         self._authenticate()
 
@@ -76,7 +85,7 @@ class DataManager:
             "usuarios_tab": usuarios_status
         }
 
-    @cachetools.func.ttl_cache(maxsize=10, ttl=60)
+    @ttl_single_flight(maxsize=10, ttl=60)
     def get_data(self, sheet_tab):
         if self.use_mock:
             return self._get_mock_data(sheet_tab)
@@ -97,29 +106,7 @@ class DataManager:
             ws = self.sheet.worksheet("Usuarios")
             cell = ws.find(user_id)
             if cell:
-                row_values = ws.row_values(cell.row)
-                # Helper para convertir string a float (manejo de comas)
-                def to_float(val):
-                    if isinstance(val, (int, float)): return float(val)
-                    if isinstance(val, str):
-                        val = val.replace(',', '.').strip()
-                        if not val: return 0.0
-                        return float(val)
-                    return 0.0
-
-                # Orden: ID, Email, Capital, Tasa, Timestamp, Balance_Historico
-                # Ajustamos índices (+1 por el email insertado)
-                capital = to_float(row_values[2]) if len(row_values) > 2 else 0
-                rate = to_float(row_values[3]) if len(row_values) > 3 else 0
-                timestamp = row_values[4] if len(row_values) > 4 else datetime.now().isoformat()
-                balance_historico = to_float(row_values[5]) if len(row_values) > 5 else 0.0
-                
-                return {
-                    "capital": capital,
-                    "rate": rate,
-                    "timestamp": timestamp,
-                    "balance_historico": balance_historico
-                }
+                return self._parse_user_row(ws.row_values(cell.row))
             return default_config
         except Exception as e:
             print(f"Error config: {e}")
@@ -140,12 +127,7 @@ class DataManager:
             except (gspread.CellNotFound, gspread.exceptions.CellNotFound):
                 cell = None
 
-            # Datos a extraer
-            capital = float(config_data.get('capital', 0))
-            rate = float(config_data.get('rate', 0))
-            balance = float(config_data.get('balance_historico', 0))
-
-            row_data = [user_id, user_email, float(capital), float(rate), timestamp, balance]
+            row_data = self._build_user_row(user_id, user_email, config_data, timestamp)
 
             if cell:
                 # El rango es A{row}:F{row}
@@ -161,6 +143,135 @@ class DataManager:
             print(f"❌ Error al guardar en Sheets: {e}")
             return False
 
+    # --- MODO ASYNC (asgi.py) ---
+    # gspread no tiene API async: las mismas lecturas/escrituras van por la API
+    # REST de Sheets con un pool httpx, sin bloquear el event loop.
+
+    @async_ttl_single_flight(maxsize=10, ttl=60)
+    async def get_data_async(self, sheet_tab):
+        if self.use_mock:
+            return self._get_mock_data(sheet_tab)
+
+        try:
+            rows = await self._values_get(f"'{sheet_tab}'")
+            if not rows:
+                return pd.DataFrame()
+            # Mismo armado que get_all_records (valores formateados + numericise),
+            # así ambos modos devuelven el mismo DataFrame
+            rows = fill_gaps(rows)
+            values = [numericise_all(row) for row in rows[1:]]
+            return pd.DataFrame(to_records(rows[0], values))
+        except Exception as e:
+            print(f"Error leyendo {sheet_tab}: {e}")
+            return self._get_mock_data(sheet_tab)
+
+    async def get_user_config_async(self, user_id):
+        default_config = {"capital": 0, "rate": 0, "timestamp": datetime.now().isoformat()}
+        if self.use_mock: return default_config
+
+        try:
+            for row_values in await self._values_get("'Usuarios'!A:F"):
+                if row_values and str(row_values[0]) == user_id:
+                    return self._parse_user_row(row_values)
+            return default_config
+        except Exception as e:
+            print(f"Error config: {e}")
+            return default_config
+
+    async def save_user_config_async(self, user_id, user_email, config_data):
+        if self.use_mock:
+            print(f"Mock Save: {user_id} ({user_email}) -> {config_data}")
+            return True
+
+        try:
+            timestamp = datetime.now().isoformat()
+            row_data = self._build_user_row(user_id, user_email, config_data, timestamp)
+
+            # Buscar específicamente en la Columna 1 (ID)
+            ids = await self._values_get("'Usuarios'!A:A")
+            row = next((i + 1 for i, r in enumerate(ids) if r and str(r[0]) == user_id), None)
+
+            client = self._client()
+            headers = await self._auth_headers()
+            params = {"valueInputOption": "RAW"}
+            if row:
+                range_label = quote(f"'Usuarios'!A{row}:F{row}")
+                resp = await client.put(f"{self.sheet.id}/values/{range_label}", params=params,
+                                        headers=headers, json={"values": [row_data]})
+            else:
+                range_label = quote("'Usuarios'!A:F")
+                resp = await client.post(f"{self.sheet.id}/values/{range_label}:append",
+                                         params={**params, "insertDataOption": "INSERT_ROWS"},
+                                         headers=headers, json={"values": [row_data]})
+            resp.raise_for_status()
+
+            print(f"✅ Configuración guardada para: {user_email}")
+            return True
+        except Exception as e:
+            print(f"❌ Error al guardar en Sheets: {e}")
+            return False
+
+    async def _values_get(self, range_label):
+        resp = await self._client().get(
+            f"{self.sheet.id}/values/{quote(range_label)}",
+            # FORMATTED_VALUE, como gspread (get_all_records / row_values)
+            params={"valueRenderOption": "FORMATTED_VALUE"},
+            headers=await self._auth_headers())
+        resp.raise_for_status()
+        return resp.json().get("values", [])
+
+    async def _auth_headers(self):
+        # oauth2client refresca el token con una llamada bloqueante: solo al vencer y fuera del loop
+        async with self._token_lock:
+            if self.creds.access_token is None or self.creds.access_token_expired:
+                await asyncio.to_thread(self.creds.get_access_token)
+        return {"Authorization": f"Bearer {self.creds.access_token}"}
+
+    def _client(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(base_url=SHEETS_API_URL + "/", timeout=10,
+                                           limits=httpx.Limits(max_connections=50, max_keepalive_connections=10))
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @staticmethod
+    def _parse_user_row(row_values):
+        # Helper para convertir string a float (manejo de comas)
+        def to_float(val):
+            if isinstance(val, (int, float)): return float(val)
+            if isinstance(val, str):
+                val = val.replace(',', '.').strip()
+                if not val: return 0.0
+                return float(val)
+            return 0.0
+
+        # Orden: ID, Email, Capital, Tasa, Timestamp, Balance_Historico
+        # Ajustamos índices (+1 por el email insertado)
+        capital = to_float(row_values[2]) if len(row_values) > 2 else 0
+        rate = to_float(row_values[3]) if len(row_values) > 3 else 0
+        timestamp = row_values[4] if len(row_values) > 4 else datetime.now().isoformat()
+        balance_historico = to_float(row_values[5]) if len(row_values) > 5 else 0.0
+
+        return {
+            "capital": capital,
+            "rate": rate,
+            "timestamp": timestamp,
+            "balance_historico": balance_historico
+        }
+
+    @staticmethod
+    def _build_user_row(user_id, user_email, config_data, timestamp):
+        # Datos a extraer
+        capital = float(config_data.get('capital', 0))
+        rate = float(config_data.get('rate', 0))
+        balance = float(config_data.get('balance_historico', 0))
+
+        return [user_id, user_email, float(capital), float(rate), timestamp, balance]
+
     def _get_mock_data(self, tab_name):
         if tab_name == "Finanzas": return self._get_mock_finanzas()
         if tab_name == "Propiedades": return self._get_mock_propiedades()
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+from market_data import MarketData
+
+
+def format_sse(event, data):
+    """Serializa un evento en formato Server-Sent Events (JSON compacto)."""
+    payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def diff_dolar_rates(old, new):
+    """Devuelve solo las cotizaciones que cambiaron, indexadas por nombre."""
+    old_by_name = {r['nombre']: r for r in old}
+    return {
+        r['nombre']: {'compra': r['compra'], 'venta': r['venta'], 'fecha': r['fecha']}
+        for r in new if old_by_name.get(r['nombre']) != r
+    }
+
+
+def diff_indicators(old, new):
+    """Devuelve solo los indicadores cuyo valor cambió."""
+    return {k: v for k, v in new.items() if old.get(k) != v}
+
+
+def keep_last_good_indicators(old, new):
+    """Toma los indicadores nuevos salvo los que llegaron "N/A" (fetch fallido) y ya tenían valor."""
+    return {k: old[k] if v.get('valor') == 'N/A' and k in old else v for k, v in new.items()}
+
+
+class LiveFeed:
+    """
+    Fan-out de actualizaciones de mercado hacia los dashboards conectados.
+
+    Una única Task por proceso consulta MarketData (ya cacheado) y publica los
+    cambios como eventos SSE preformateados en un buffer circular. Cada
+    conexión (modo async, asgi.py) espera sobre un Future del event loop y
+    reenvía los eventos nuevos, así que una conexión ociosa no ocupa un hilo y
+    refrescar cotizaciones cuesta un par de bytes por cliente.
+
+    Los eventos con `user_id` (checkpoints de balance) solo se envían a las
+    conexiones de ese usuario dentro del mismo proceso.
+    """
+
+    def __init__(self, poll_interval=30, history=256):
+        self.poll_interval = poll_interval
+        self._events = deque(maxlen=history)
+        self._seq = 0
+        self._lock = threading.Lock()
+        # Conexiones del modo async (asgi.py): (loop, future) a despertar en publish
+        self._async_waiters = set()
+        self._rates = []
+        self._indicators = {}
+        self._task = None
+        self._ready = asyncio.Event()
+
+    async def start(self):
+        """
+        Arranca (una vez por proceso) la Task que refresca el feed en el event loop
+        y espera al primer snapshot.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        await self._ready.wait()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error refrescando live feed: {e}")
+            self._ready.set()
+            await asyncio.sleep(self.poll_interval)
+
+    async def refresh(self):
+        # Mismas caches single-flight que usa el dashboard async: una llamada upstream por expiración
+        rates, indicators = await asyncio.gather(
+            MarketData.get_dolar_rates_async(),
+            MarketData.get_economic_indicators_async(),
+        )
+
+        # DolarApi caído devuelve []: no pisamos las cotizaciones ya mostradas
+        if rates:
+            changed = diff_dolar_rates(self._rates, rates)
+            self._rates = rates
+            if changed:
+                self.publish('rates', changed)
+        # ArgentinaDatos caído no devuelve vacío sino placeholders "N/A":
+        # por indicador, conservamos el último valor bueno en vez de difundir el N/A
+        indicators = keep_last_good_indicators(self._indicators, indicators)
+        changed = diff_indicators(self._indicators, indicators)
+        self._indicators = indicators
+        if changed:
+            self.publish('indicators', changed)
+
+    def snapshot(self):
+        return {'rates': diff_dolar_rates([], self._rates), 'indicators': self._indicators}
+
+    def publish(self, event, data, user_id=None):
+        message = format_sse(event, data)
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, user_id, message))
+            waiters, self._async_waiters = self._async_waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    @property
+    def seq(self):
+        return self._seq
+
+    async def wait_async(self, after_seq, timeout):
+        """
+        Espera hasta que haya eventos posteriores a `after_seq` o venza el timeout,
+        sin ocupar un hilo: la espera es un Future del event loop.
+        Retorna (nuevo_seq, eventos, perdidos); `perdidos` indica que el cliente
+        quedó fuera del buffer y necesita un snapshot completo.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            if self._seq > after_seq:
+                return self._collect(after_seq)
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._async_waiters.discard(waiter)
+        with self._lock:
+            return self._collect(after_seq)
+
+    def _collect(self, after_seq):
+        if self._seq == after_seq:
+            return after_seq, [], False
+        missed = bool(self._events) and self._events[0][0] > after_seq + 1
+        events = [(user_id, msg) for seq, user_id, msg in self._events if seq > after_seq]
+        return self._seq, events, missed
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
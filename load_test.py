@@ -0,0 +1,323 @@
+"""
+Harness de carga end-to-end para `gunicorn app:app`.
+
+Levanta servidores falsos para DolarApi / ArgentinaDatos y arranca gunicorn con
+loadtest_app.py (la app real + login de prueba + DataManager en MOCK con la
+misma latencia simulada que los upstreams en cada lectura/escritura), y dispara
+tráfico mixto (dashboard, GET/POST de configuración) desde muchos clientes
+concurrentes. Reporta throughput y p50/p95/p99 por ruta para cada
+configuración de workers/threads.
+
+Uso:
+    python load_test.py --users 50 --duration 30 --configs 1x1,2x1,4x1,2x8,4x8
+    python load_test.py --asgi --configs 1,2     # modo async (asgi.py + uvicorn)
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Mezcla de tráfico: (nombre de la acción, peso)
+TRAFFIC_MIX = [
+    ("dashboard", 0.3),
+    ("config_get", 0.5),
+    ("config_post_burst", 0.2),
+]
+POST_BURST_SIZE = 3
+LOGIN_ROUTE = "GET /loadtest/login"
+
+
+# --- SERVIDORES FALSOS (UPSTREAMS) ---
+def _fake_dolares():
+    now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+    casas = [("oficial", "Oficial"), ("blue", "Blue"), ("bolsa", "Bolsa"),
+             ("contadoconliqui", "Contado con liquidación"), ("tarjeta", "Tarjeta")]
+    return [
+        {"casa": casa, "nombre": nombre, "compra": 1000 + i * 50, "venta": 1050 + i * 50,
+         "fechaActualizacion": now}
+        for i, (casa, nombre) in enumerate(casas)
+    ]
+
+
+def _fake_serie(valor):
+    return [{"fecha": time.strftime("%Y-%m-%d"), "valor": valor}]
+
+
+FAKE_ROUTES = {
+    "/v1/dolares": _fake_dolares,
+    "/v1/finanzas/tasas/plazoFijo": lambda: _fake_serie(0.32),
+    "/v1/finanzas/indices/uva": lambda: _fake_serie(1450.25),
+    "/v1/finanzas/indices/cer": lambda: _fake_serie(580.12),
+}
+
+
+def start_fake_upstream(latency):
+    """Levanta un servidor HTTP local que imita las APIs de mercado."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            route = FAKE_ROUTES.get(self.path.split("?")[0])
+            if route is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps(route()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- GUNICORN ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(workers, threads, upstream_url, workdir, upstream_latency, asgi=False):
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        # Ni siquiera el dm original de app.py conecta a la hoja real
+        "GOOGLE_CREDENTIALS_JSON": "",
+        # Sheets en MOCK pero esperando como la hoja real: es lo que decide workers vs threads
+        "LOADTEST_SHEETS_LATENCY": str(upstream_latency),
+        "DOLAR_API_URL": f"{upstream_url}/v1/dolares",
+        "ARGENTINA_DATOS_URL": f"{upstream_url}/v1",
+        "AUTH0_DOMAIN": env.get("AUTH0_DOMAIN") or "loadtest.invalid",
+        # Folium avisa en cada render del mapa; ensucia la salida del reporte
+        "PYTHONWARNINGS": "ignore::UserWarning",
+    })
+    if asgi:
+        # Modo async: threads no aplica, cada worker es un event loop
+        cmd = [
+            sys.executable, "-m", "uvicorn", "loadtest_app:asgi_app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers),
+            "--app-dir", REPO_DIR,
+            "--log-level", "warning",
+        ]
+    else:
+        cmd = [
+            sys.executable, "-m", "gunicorn", "loadtest_app:app",
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers),
+            "--threads", str(threads),
+            "--pythonpath", REPO_DIR,
+            "--log-level", "warning",
+        ]
+    # workdir vacío: sin .env ni credentials.json del repo en el cwd
+    proc = subprocess.Popen(cmd, env=env, cwd=workdir, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"el servidor terminó con código {proc.returncode}")
+        try:
+            if requests.get(f"{base_url}/login_page", timeout=1).status_code == 200:
+                return proc, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_app(proc)
+    raise RuntimeError("el servidor no respondió a tiempo")
+
+
+def stop_app(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# --- CLIENTES ---
+def _timed(results, route, fn):
+    start = time.perf_counter()
+    try:
+        resp = fn()
+        # Sin seguir redirects: un 302 a /login_page es un error, no un 200 rápido
+        ok = resp.status_code < 300
+    except requests.RequestException:
+        ok = False
+    results[route].append((time.perf_counter() - start, ok))
+
+
+def client_loop(base_url, user_idx, stop_at, think, results, seed):
+    rnd = random.Random(seed)
+    session = requests.Session()
+    _timed(results, LOGIN_ROUTE,
+           lambda: session.get(f"{base_url}/loadtest/login", params={"user": f"loadtest|{user_idx}"},
+                               timeout=30, allow_redirects=False))
+    if not results[LOGIN_ROUTE][-1][1]:
+        # Sin sesión todo terminaría en redirects: el cliente se cuenta como error y no sigue
+        print(f"❌ Login de prueba falló para loadtest|{user_idx} (¿se levantó loadtest_app?)")
+        return
+    actions, weights = zip(*TRAFFIC_MIX)
+
+    while time.time() < stop_at:
+        action = rnd.choices(actions, weights)[0]
+        if action == "dashboard":
+            _timed(results, "GET /", lambda: session.get(f"{base_url}/", timeout=30, allow_redirects=False))
+        elif action == "config_get":
+            _timed(results, "GET /api/financial-config",
+                   lambda: session.get(f"{base_url}/api/financial-config", timeout=30,
+                                       allow_redirects=False))
+        else:
+            for _ in range(POST_BURST_SIZE):
+                payload = {"capital": rnd.randint(1, 10) * 100000, "rate": rnd.uniform(20, 60),
+                           "balance_historico": rnd.uniform(0, 5000)}
+                _timed(results, "POST /api/financial-config",
+                       lambda: session.post(f"{base_url}/api/financial-config", json=payload, timeout=30,
+                                            allow_redirects=False))
+        if think:
+            time.sleep(rnd.uniform(0, 2 * think))
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    idx = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[idx]
+
+
+def run_scenario(base_url, users, duration, think):
+    per_client = [defaultdict(list) for _ in range(users)]
+    stop_at = time.time() + duration
+    threads = [
+        threading.Thread(target=client_loop, args=(base_url, i, stop_at, think, per_client[i], i), daemon=True)
+        for i in range(users)
+    ]
+    started = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - started
+
+    merged = defaultdict(list)
+    for results in per_client:
+        for route, samples in results.items():
+            merged[route].extend(samples)
+
+    report = {}
+    for route, samples in sorted(merged.items()):
+        latencies = sorted(lat for lat, _ in samples)
+        report[route] = {
+            "requests": len(samples),
+            "errors": sum(1 for _, ok in samples if not ok),
+            "rps": len(samples) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+    # El login es una vez por cliente: no cuenta para el throughput
+    measured = [r for route, r in report.items() if route != LOGIN_ROUTE]
+    total = sum(r["requests"] for r in measured)
+    report["TOTAL"] = {
+        "requests": total,
+        "errors": sum(r["errors"] for r in report.values()),
+        "rps": total / elapsed,
+    }
+    return report
+
+
+def print_report(label, report):
+    print(f"\n=== {label} ===")
+    print(f"{'Ruta':<30}{'req':>8}{'err':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for route, r in report.items():
+        if route == "TOTAL":
+            continue
+        print(f"{route:<30}{r['requests']:>8}{r['errors']:>6}{r['rps']:>9.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+    t = report["TOTAL"]
+    print(f"{'TOTAL':<30}{t['requests']:>8}{t['errors']:>6}{t['rps']:>9.1f}")
+
+
+def parse_configs(raw):
+    configs = []
+    for item in raw.split(","):
+        workers, _, threads = item.strip().partition("x")
+        configs.append((int(workers), int(threads or 1)))
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test end-to-end de la app Flask bajo gunicorn.")
+    parser.add_argument("--users", type=int, default=50, help="Clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos por configuración")
+    parser.add_argument("--configs", default="1x1,2x1,4x1,2x8,4x8",
+                        help="Lista de WORKERSxTHREADS separada por comas")
+    parser.add_argument("--think", type=float, default=0.1, help="Pausa media entre acciones (s)")
+    parser.add_argument("--upstream-latency", type=float, default=0.25,
+                        help="Latencia simulada de las APIs de mercado y de Sheets (s)")
+    parser.add_argument("--asgi", action="store_true",
+                        help="Servir asgi:app con uvicorn (modo async); THREADS se ignora")
+    parser.add_argument("--json", dest="json_out", help="Guardar resultados en este archivo JSON")
+    args = parser.parse_args()
+
+    upstream = start_fake_upstream(args.upstream_latency)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+    print(f"🛰️ Upstreams falsos en {upstream_url}")
+
+    all_reports = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for workers, threads in parse_configs(args.configs):
+            if args.asgi:
+                label = f"asgi workers={workers}"
+            else:
+                label = f"workers={workers} threads={threads}"
+            print(f"\n🚀 Arrancando servidor ({label})...")
+            proc, base_url = start_app(workers, threads, upstream_url, workdir, args.upstream_latency,
+                                       asgi=args.asgi)
+            try:
+                report = run_scenario(base_url, args.users, args.duration, args.think)
+            finally:
+                stop_app(proc)
+            all_reports[label] = report
+            print_report(label, report)
+
+    upstream.shutdown()
+
+    print("\n=== Comparativa ===")
+    print(f"{'Config':<26}{'req/s':>9}{'err':>6}{'GET / p95':>12}{'config p95':>12}")
+    for label, report in all_reports.items():
+        dash = report.get("GET /", {}).get("p95_ms", 0)
+        cfg = report.get("GET /api/financial-config", {}).get("p95_ms", 0)
+        print(f"{label:<26}{report['TOTAL']['rps']:>9.1f}{report['TOTAL']['errors']:>6}{dash:>12.1f}{cfg:>12.1f}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(all_reports, f, indent=2)
+        print(f"\n💾 Resultados guardados en {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
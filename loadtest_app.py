@@ -0,0 +1,81 @@
+"""
+Entrypoint SOLO para load_test.py. Nunca desplegar.
+
+Envuelve la app real con lo que el harness necesita y producción no debe tener:
+- /loadtest/login: login sin Auth0 para autenticar clientes concurrentes.
+- Un DataManager siempre en MOCK que espera LOADTEST_SHEETS_LATENCY segundos en
+  cada lectura/escritura, como lo haría Sheets.
+
+Uso (lo arma load_test.py):
+    gunicorn loadtest_app:app            # modo sync
+    uvicorn loadtest_app:asgi_app        # modo async
+"""
+import asyncio
+import os
+import time
+
+from flask import jsonify, request, session
+from flask_login import login_user
+
+import app as app_module
+from data_manager import DataManager
+from singleflight import ttl_single_flight, async_ttl_single_flight
+
+SHEETS_LATENCY = float(os.environ.get("LOADTEST_SHEETS_LATENCY") or 0)
+
+
+class SimulatedSheetsDataManager(DataManager):
+    """DataManager en MOCK con la latencia de Sheets simulada (dentro de las caches)."""
+
+    def _authenticate(self):
+        # Nunca tocar la hoja real, haya o no credenciales en el entorno
+        self.use_mock = True
+        self.last_error = "Load test: MOCK con latencia simulada"
+
+    @ttl_single_flight(maxsize=10, ttl=60)
+    def get_data(self, sheet_tab):
+        time.sleep(SHEETS_LATENCY)
+        return self._get_mock_data(sheet_tab)
+
+    def get_user_config(self, user_id):
+        time.sleep(SHEETS_LATENCY)
+        return super().get_user_config(user_id)
+
+    def save_user_config(self, user_id, user_email, config_data):
+        time.sleep(SHEETS_LATENCY)
+        return super().save_user_config(user_id, user_email, config_data)
+
+    @async_ttl_single_flight(maxsize=10, ttl=60)
+    async def get_data_async(self, sheet_tab):
+        await asyncio.sleep(SHEETS_LATENCY)
+        return self._get_mock_data(sheet_tab)
+
+    async def get_user_config_async(self, user_id):
+        await asyncio.sleep(SHEETS_LATENCY)
+        return await super().get_user_config_async(user_id)
+
+    async def save_user_config_async(self, user_id, user_email, config_data):
+        await asyncio.sleep(SHEETS_LATENCY)
+        return await super().save_user_config_async(user_id, user_email, config_data)
+
+
+# Reemplazar antes de importar asgi.py, que toma `dm` de app.py al importarse
+app_module.dm = SimulatedSheetsDataManager()
+app = app_module.app
+
+
+@app.route('/loadtest/login')
+def loadtest_login():
+    user_id = request.args.get('user', 'loadtest|0')
+    user_info = {"sub": user_id, "name": "Load Test", "email": f"{user_id}@loadtest.local"}
+    session['user_info'] = user_info
+    login_user(app_module.User(user_info['sub'], user_info['name'], user_info['email']))
+    return jsonify({"status": "ok", "user": user_id})
+
+
+def __getattr__(name):
+    # asgi_app se importa a pedido: importar asgi.py activa LIVE_UPDATES, que en modo sync no va
+    if name == "asgi_app":
+        import asgi
+        return asgi.app
+    raise AttributeError(name)
@@ -1,11 +1,20 @@
+import os
+import asyncio
 import requests
-import cachetools.func
+import httpx
+from singleflight import ttl_single_flight, async_ttl_single_flight
 
 class MarketData:
-    BASE_URL = "https://dolarapi.com/v1/dolares"
+    # Las URLs se pueden sobreescribir por entorno (ej: servidores falsos de load_test.py)
+    BASE_URL = os.environ.get("DOLAR_API_URL", "https://dolarapi.com/v1/dolares")
+    ARGENTINA_DATOS_URL = os.environ.get("ARGENTINA_DATOS_URL", "https://api.argentinadatos.com/v1")
+
+    # Clientes HTTP async con pool de conexiones (modo async, se crean al primer uso)
+    _async_client = None
+    _async_insecure_client = None
 
     @staticmethod
-    @cachetools.func.ttl_cache(maxsize=10, ttl=300) # Cache por 5 minutos
+    @ttl_single_flight(maxsize=10, ttl=300) # Cache por 5 minutos
     def get_dolar_rates():
         """
         Obtiene las cotizaciones del dólar (Oficial, Blue, MEP, CCL, Tarjeta)
@@ -14,51 +23,56 @@ class MarketData:
         try:
             response = requests.get(MarketData.BASE_URL, timeout=5)
             response.raise_for_status()
-            data = response.json()
-            
-            # Filtramos y ordenamos lo que nos interesa
-            tipos_interes = ['oficial', 'blue', 'bolsa', 'contadoconliqui', 'tarjeta']
-            filtered_data = [d for d in data if d['casa'] in tipos_interes]
-            
-            # Mapeo de nombres amigables
-            nombres = {
-                'oficial': 'Oficial',
-                'blue': 'Blue',
-                'bolsa': 'MEP',
-                'contadoconliqui': 'CCL',
-                'tarjeta': 'Tarjeta'
-            }
-            
-            results = []
-            for item in filtered_data:
-                results.append({
-                    'nombre': nombres.get(item['casa'], item['nombre']),
-                    'compra': item['compra'],
-                    'venta': item['venta'],
-                    'fecha': item['fechaActualizacion']
-                })
-                
-            return results
+            return MarketData._parse_dolar_rates(response.json())
+        except Exception as e:
+            print(f"Error fetching market data: {e}")
+            return []
+
+    @staticmethod
+    @async_ttl_single_flight(maxsize=10, ttl=300) # Cache por 5 minutos
+    async def get_dolar_rates_async():
+        """Versión async de get_dolar_rates (usa el pool de httpx)."""
+        try:
+            response = await MarketData._client().get(MarketData.BASE_URL, timeout=5)
+            response.raise_for_status()
+            return MarketData._parse_dolar_rates(response.json())
         except Exception as e:
             print(f"Error fetching market data: {e}")
             return []
 
     @staticmethod
-    @cachetools.func.ttl_cache(maxsize=10, ttl=3600) # Cache por 1 hora
+    def _parse_dolar_rates(data):
+        # Filtramos y ordenamos lo que nos interesa
+        tipos_interes = ['oficial', 'blue', 'bolsa', 'contadoconliqui', 'tarjeta']
+        filtered_data = [d for d in data if d['casa'] in tipos_interes]
+
+        # Mapeo de nombres amigables
+        nombres = {
+            'oficial': 'Oficial',
+            'blue': 'Blue',
+            'bolsa': 'MEP',
+            'contadoconliqui': 'CCL',
+            'tarjeta': 'Tarjeta'
+        }
+
+        results = []
+        for item in filtered_data:
+            results.append({
+                'nombre': nombres.get(item['casa'], item['nombre']),
+                'compra': item['compra'],
+                'venta': item['venta'],
+                'fecha': item['fechaActualizacion']
+            })
+
+        return results
+
+    @staticmethod
+    @ttl_single_flight(maxsize=10, ttl=3600) # Cache por 1 hora
     def get_economic_indicators():
         """
-        Obtiene indicadores económicos (UVA, CER, Plazo Fijo, Badlar) 
+        Obtiene indicadores económicos (UVA, CER, Plazo Fijo, Badlar)
         desde ArgentinaDatos API.
         """
-        indicators = {
-            "tna_pf": {"nombre": "Plazo Fijo (TNA)", "valor": "N/A", "fecha": "-"},
-            "cer": {"nombre": "CER", "valor": "N/A", "fecha": "-"},
-            "uva": {"nombre": "UVA", "valor": "N/A", "fecha": "-"},
-            "badlar": {"nombre": "Badlar", "valor": "N/A", "fecha": "-"},
-            "caucion": {"nombre": "Caución (Est.)", "valor": "32.5%", "fecha": "Est."}, # Placeholder
-            "tamar": {"nombre": "Tamar", "valor": "N/A", "fecha": "-"}
-        }
-
         # Helper para hacer requests seguros (o inseguros si falla SSL)
         def fetch_api(url):
             try:
@@ -67,7 +81,7 @@ class MarketData:
                     resp = requests.get(url, timeout=3)
                 except requests.exceptions.SSLError:
                     resp = requests.get(url, timeout=3, verify=False)
-                
+
                 if resp.status_code == 200:
                     return resp.json()
             except Exception as e:
@@ -76,21 +90,78 @@ class MarketData:
 
         # 1. Plazo Fijo (TNA) - Usamos una fuente alternativa o hardcodeamos si falla
         # ArgentinaDatos endpoint para plazo fijo
-        pf_data = fetch_api("https://api.argentinadatos.com/v1/finanzas/tasas/plazoFijo")
+        pf_data = fetch_api(f"{MarketData.ARGENTINA_DATOS_URL}/finanzas/tasas/plazoFijo")
+        # 2. UVA
+        uva_data = fetch_api(f"{MarketData.ARGENTINA_DATOS_URL}/finanzas/indices/uva")
+        # 3. CER
+        cer_data = fetch_api(f"{MarketData.ARGENTINA_DATOS_URL}/finanzas/indices/cer")
+
+        return MarketData._build_indicators(pf_data, uva_data, cer_data)
+
+    @staticmethod
+    @async_ttl_single_flight(maxsize=10, ttl=3600) # Cache por 1 hora
+    async def get_economic_indicators_async():
+        """Versión async de get_economic_indicators: las tres series se piden en paralelo."""
+        async def fetch_api(url):
+            try:
+                try:
+                    resp = await MarketData._client().get(url, timeout=3)
+                except httpx.ConnectError as e:
+                    if 'CERTIFICATE_VERIFY_FAILED' not in str(e):
+                        raise
+                    resp = await MarketData._client(verify=False).get(url, timeout=3)
+
+                if resp.status_code == 200:
+                    return resp.json()
+            except Exception as e:
+                print(f"Error fetching {url}: {e}")
+            return None
+
+        pf_data, uva_data, cer_data = await asyncio.gather(
+            fetch_api(f"{MarketData.ARGENTINA_DATOS_URL}/finanzas/tasas/plazoFijo"),
+            fetch_api(f"{MarketData.ARGENTINA_DATOS_URL}/finanzas/indices/uva"),
+            fetch_api(f"{MarketData.ARGENTINA_DATOS_URL}/finanzas/indices/cer"),
+        )
+        return MarketData._build_indicators(pf_data, uva_data, cer_data)
+
+    @staticmethod
+    def _build_indicators(pf_data, uva_data, cer_data):
+        indicators = {
+            "tna_pf": {"nombre": "Plazo Fijo (TNA)", "valor": "N/A", "fecha": "-"},
+            "cer": {"nombre": "CER", "valor": "N/A", "fecha": "-"},
+            "uva": {"nombre": "UVA", "valor": "N/A", "fecha": "-"},
+            "badlar": {"nombre": "Badlar", "valor": "N/A", "fecha": "-"},
+            "caucion": {"nombre": "Caución (Est.)", "valor": "32.5%", "fecha": "Est."}, # Placeholder
+            "tamar": {"nombre": "Tamar", "valor": "N/A", "fecha": "-"}
+        }
+
         if pf_data and len(pf_data) > 0:
             last = pf_data[-1] # Ultimo valor
             indicators["tna_pf"] = {"nombre": "Plazo Fijo (TNA)", "valor": f"{last.get('valor', 0)*100:.1f}%", "fecha": last.get('fecha', '-')}
 
-        # 2. UVA
-        uva_data = fetch_api("https://api.argentinadatos.com/v1/finanzas/indices/uva")
         if uva_data and len(uva_data) > 0:
             last = uva_data[-1]
             indicators["uva"] = {"nombre": "UVA", "valor": f"${last.get('valor', 0):.2f}", "fecha": last.get('fecha', '-')}
-            
-        # 3. CER
-        cer_data = fetch_api("https://api.argentinadatos.com/v1/finanzas/indices/cer")
+
         if cer_data and len(cer_data) > 0:
             last = cer_data[-1]
             indicators["cer"] = {"nombre": "CER", "valor": f"{last.get('valor', 0):.2f}", "fecha": last.get('fecha', '-')}
 
         return indicators
+
+    @classmethod
+    def _client(cls, verify=True):
+        if verify:
+            if cls._async_client is None:
+                cls._async_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=20))
+            return cls._async_client
+        if cls._async_insecure_client is None:
+            cls._async_insecure_client = httpx.AsyncClient(verify=False)
+        return cls._async_insecure_client
+
+    @classmethod
+    async def aclose(cls):
+        for client in (cls._async_client, cls._async_insecure_client):
+            if client is not None:
+                await client.aclose()
+        cls._async_client = cls._async_insecure_client = None
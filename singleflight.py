@@ -0,0 +1,163 @@
+import asyncio
+import functools
+import math
+import random
+import threading
+import time
+
+from cachetools.keys import hashkey
+
+
+class _Entry:
+    __slots__ = ('value', 'expires', 'delta')
+
+    def __init__(self, value, expires, delta):
+        self.value = value
+        self.expires = expires
+        # Cuánto tardó en calcularse: los valores caros se refrescan antes
+        self.delta = delta
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def _should_refresh(entry, now, beta):
+    if now >= entry.expires:
+        return True
+    # 1 - random() evita log(0)
+    return now - entry.delta * beta * math.log(1.0 - random.random()) >= entry.expires
+
+
+def _evict(cache, now, maxsize):
+    for key in [k for k, e in cache.items() if e.expires <= now]:
+        del cache[key]
+    while len(cache) > maxsize:
+        del cache[next(iter(cache))]
+
+
+def ttl_single_flight(maxsize=128, ttl=600, beta=1.0, timer=time.monotonic):
+    """
+    Reemplazo de `cachetools.func.ttl_cache` con coalescing de cache misses.
+
+    - Single-flight: si varios hilos piden la misma clave sin cache, solo el
+      primero ejecuta la función; el resto espera y recibe ese mismo resultado.
+    - Refresco temprano probabilístico (XFetch): antes de vencer, cada lectura
+      puede disparar el recálculo con probabilidad creciente a medida que se
+      acerca la expiración. Mientras tanto el resto sigue recibiendo el valor
+      vigente, así las expiraciones de distintos workers no coinciden.
+    """
+
+    def decorator(func):
+        cache = {}
+        inflight = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = hashkey(*args, **kwargs)
+            now = timer()
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and not _should_refresh(entry, now, beta):
+                    return entry.value
+                call = inflight.get(key)
+                if call is not None:
+                    # Ya hay un refresco temprano en curso: el valor vigente sirve
+                    if entry is not None and now < entry.expires:
+                        return entry.value
+                    leader = False
+                else:
+                    call = inflight[key] = _Call()
+                    leader = True
+
+            if not leader:
+                call.done.wait()
+                if call.error is not None:
+                    raise call.error
+                return call.value
+
+            start = timer()
+            try:
+                call.value = func(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+                raise
+            else:
+                end = timer()
+                with lock:
+                    cache[key] = _Entry(call.value, end + ttl, end - start)
+                    _evict(cache, end, maxsize)
+                return call.value
+            finally:
+                with lock:
+                    del inflight[key]
+                call.done.set()
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+def async_ttl_single_flight(maxsize=128, ttl=600, beta=1.0, timer=time.monotonic):
+    """
+    Versión para corutinas de `ttl_single_flight` (modo async, ver asgi.py).
+
+    El recálculo corre en una Task compartida: si el cliente que lo disparó se
+    desconecta, el resto de los que esperan igual recibe el resultado. En el
+    refresco temprano nadie espera: se lanza la Task y se devuelve el valor vigente.
+    """
+
+    def decorator(func):
+        cache = {}
+        inflight = {}
+
+        def launch(key, args, kwargs):
+            task = inflight.get(key)
+            if task is not None:
+                return task
+
+            async def run():
+                start = timer()
+                value = await func(*args, **kwargs)
+                end = timer()
+                cache[key] = _Entry(value, end + ttl, end - start)
+                _evict(cache, end, maxsize)
+                return value
+
+            def done(task):
+                inflight.pop(key, None)
+                # Marca la excepción como leída aunque nadie haya esperado (refresco temprano)
+                if not task.cancelled():
+                    task.exception()
+
+            task = inflight[key] = asyncio.ensure_future(run())
+            task.add_done_callback(done)
+            return task
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = hashkey(*args, **kwargs)
+            now = timer()
+            entry = cache.get(key)
+            if entry is not None and not _should_refresh(entry, now, beta):
+                return entry.value
+            task = launch(key, args, kwargs)
+            if entry is not None and now < entry.expires:
+                return entry.value
+            return await asyncio.shield(task)
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import ttl_single_flight, async_ttl_single_flight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# beta=0 desactiva el refresco temprano: solo se recalcula al vencer
+
+def test_concurrent_threads_share_one_call():
+    calls = []
+    release = threading.Event()
+
+    @ttl_single_flight(ttl=60, beta=0)
+    def fetch(key):
+        calls.append(key)
+        release.wait(5)
+        return f"valor-{key}"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetch("a"))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == ["a"]
+    assert results == ["valor-a"] * 10
+
+
+def test_thread_waiters_get_leader_exception():
+    calls = []
+    release = threading.Event()
+
+    @ttl_single_flight(ttl=60, beta=0)
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("upstream caído")
+
+    errors = []
+
+    def call():
+        try:
+            fetch()
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert errors == ["upstream caído"] * 5
+
+
+def test_expired_entry_is_refetched():
+    clock = FakeClock()
+    calls = []
+
+    @ttl_single_flight(ttl=10, beta=0, timer=clock)
+    def fetch():
+        calls.append(clock.now)
+        return len(calls)
+
+    assert fetch() == 1
+    clock.now = 9
+    assert fetch() == 1
+    clock.now = 10
+    assert fetch() == 2
+    assert calls == [0, 10]
+
+
+def test_concurrent_coroutines_share_one_call():
+    calls = []
+
+    @async_ttl_single_flight(ttl=60, beta=0)
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return f"valor-{key}"
+
+    async def main():
+        return await asyncio.gather(*(fetch("a") for _ in range(10)))
+
+    assert asyncio.run(main()) == ["valor-a"] * 10
+    assert calls == ["a"]
+
+
+def test_coroutine_waiters_get_leader_exception():
+    calls = []
+
+    @async_ttl_single_flight(ttl=60, beta=0)
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream caído")
+
+    async def main():
+        return await asyncio.gather(*(fetch() for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_async_expired_entry_is_refetched():
+    clock = FakeClock()
+    calls = []
+
+    @async_ttl_single_flight(ttl=10, beta=0, timer=clock)
+    async def fetch():
+        calls.append(clock.now)
+        return len(calls)
+
+    async def main():
+        first = await fetch()
+        clock.now = 9
+        cached = await fetch()
+        clock.now = 10
+        return first, cached, await fetch()
+
+    assert asyncio.run(main()) == (1, 1, 2)
+    assert calls == [0, 10]
+
+
+def test_cancelling_first_waiter_does_not_cancel_fetch():
+    calls = []
+
+    @async_ttl_single_flight(ttl=60, beta=0)
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "valor"
+
+    async def main():
+        first = asyncio.ensure_future(fetch())
+        await asyncio.sleep(0)
+        others = [asyncio.ensure_future(fetch()) for _ in range(3)]
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await asyncio.gather(*others)
+
+    assert asyncio.run(main()) == ["valor"] * 3
+    assert calls == [1]
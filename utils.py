@@ -1,3 +1,4 @@
+import math
 import pandas as pd
 from datetime import datetime
 
@@ -56,3 +57,43 @@ def calculate_financial_pulse(finanzas_df):
     pesos_per_second = daily_gain / (24 * 60 * 60)
     
     return pesos_per_second, daily_gain, total_capital
+
+def calculate_current_balance(config, now=None):
+    """
+    Pone al día el balance de una configuración de usuario ("catch-up"):
+    balance histórico + ganancia acumulada desde el último timestamp guardado.
+    Retorna (balance_actual, now).
+    """
+    now = now or datetime.now()
+    last_ts = datetime.fromisoformat(config.get('timestamp'))
+    diff_seconds = (now - last_ts).total_seconds()
+
+    capital = float(config.get('capital', 0))
+    rate = float(config.get('rate', 0))
+    balance_historico = float(config.get('balance_historico', 0))
+
+    # Ganancia por segundo (Gs)
+    gs = (capital * (rate / 100)) / 31536000 # 365 * 24 * 3600
+
+    # Nuevo saldo inicial = histórico + (tiempo * ganancia)
+    accrued_profit = max(0, diff_seconds * gs)
+    return balance_historico + accrued_profit, now
+
+def parse_financial_config(data):
+    """
+    Valida el payload de /api/financial-config y lo convierte a números una sola vez.
+    Lanza ValueError si no es un objeto o algún campo no es numérico.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("El payload debe ser un objeto JSON")
+
+    config = {}
+    for field in ('capital', 'rate', 'balance_historico'):
+        try:
+            value = float(data.get(field, 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"'{field}' debe ser numérico")
+        if not math.isfinite(value):
+            raise ValueError(f"'{field}' debe ser finito")
+        config[field] = value
+    return config